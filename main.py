@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import os, sys, time, math, random, glob, asyncio
+import os, sys, re, time, math, random, glob, asyncio
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from operator import attrgetter
+from typing import Protocol
 import pygame
 
 WIDTH, HEIGHT = 800, 600
@@ -17,6 +22,7 @@ JOY_BASE_POS = (120, HEIGHT - 120)   # left-bottom
 JOY_BASE_R   = 35
 JOY_KNOB_R   = 16
 JOY_DEADZONE = 0.12                  # ignore tiny jitters
+JOY_SPEED_MULT = 2.0                 # stick used to be applied twice per frame; keep that feel
 
 FIRE_POS     = (WIDTH - 120, HEIGHT - 120)  # right-bottom
 FIRE_R       = 56
@@ -28,6 +34,8 @@ _UI_SIDE_MARGIN   = 90            # distance from left/right edge
 JOY_BASE_POS = ( _UI_SIDE_MARGIN, HEIGHT - _UI_BOTTOM_MARGIN )
 FIRE_POS     = ( WIDTH - _UI_SIDE_MARGIN, HEIGHT - _UI_BOTTOM_MARGIN )
 FIRE_R       = 28                 # was 56
+_JOY_R2  = JOY_BASE_R * JOY_BASE_R   # squared hit radii for TouchControls._which_zone
+_FIRE_R2 = FIRE_R * FIRE_R
 FIRE_COLOR   = (255, 200, 80)
 
 # Big enemy sizing (relative guarantees)
@@ -39,9 +47,6 @@ BIG_MIN_ABS_H = 60
 BIG_MAX_ABS_W = int(WIDTH * 0.70)   # prevent skyscraper-wide bosses
 BIG_MAX_ABS_H = int(HEIGHT * 0.55)  # prevent skyscraper-tall bosses
 
-# Only allow big enemies when the letter is explicitly 'B'
-ONLY_EXPLICIT_BOSS = True
-
 # Optional spawn debug
 DEBUG_SPAWN = False
 
@@ -52,6 +57,8 @@ KAMIKAZE_SPEED = 200.0
 KAMIKAZE_BOOST = 200.0
 KAMIKAZE_LOCK_DX = 100
 KAMIKAZE_LOCK_DY = 600
+FAN_DIAG_SPEED = PLAYER_BULLET_SPEED / math.sqrt(2)  # per-axis speed of the 45-degree fan shots
+KAMIKAZE_SPEED_INV_100 = 100.0 / KAMIKAZE_SPEED  # folded 1 / (KAMIKAZE_SPEED/100)
 
 ENEMY_BULLET_SPEED = 300.0
 ENEMY_FIRE_COOLDOWN = (0.5, 1.0)
@@ -64,10 +71,27 @@ SPAWN_ROW_MS = 800
 DROP_CHANCE = 0.35
 DROP_TYPES = ["health", "ammo", "enhanced", "fan"]
 DROP_WEIGHTS = {"health": 1, "ammo": 1, "enhanced": 2, "fan": 2}
+# Precomputed once for random.choices(..., cum_weights=...)
+DROP_KINDS = list(DROP_WEIGHTS)
+DROP_CUM = list(accumulate(int(max(1, DROP_WEIGHTS[k])) for k in DROP_KINDS))
 
 SAFE_ZONE_TAIL_MS = 5000
+
+# Collision broad phase: "hash" (uniform grid) or "quadtree"
+COLLISION_BACKEND = "hash"
+SPATIAL_HASH_CELL = 64    # bucket size of the uniform hash (px)
+QUADTREE_MIN_LEAF = 64    # stop subdividing below this node size (px)
 WHITE=(255,255,255); BLACK=(0,0,0); GREEN=(0,220,0); RED=(220,40,40); YELLOW=(250,220,80); BLUE=(60,160,255); GRAY=(100,100,100)
 
+SCREEN_RECT = pygame.Rect(0, 0, WIDTH, HEIGHT)
+# Keys polled every frame, bound once so the hot paths skip the pygame.K_* attribute lookups
+_K_LEFT, _K_RIGHT, _K_UP, _K_DOWN = pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN
+_K_A, _K_D, _K_W, _K_S, _K_SPACE = pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_SPACE
+HUD_RECT    = pygame.Rect(0, 0, 200, 72)   # covers the Lives/Enhanced/Diagonal lines
+BG_STRIP_MAX_H = 4096                      # tallest background composited into one surface
+HUD_TEXT_CACHE_MAX = 128                   # rendered HUD strings kept by Game._render_text
+BLINK_FRAMES = max(1, FPS // 10)           # frames per on/off phase of the invulnerability flicker
+
 # Web vs desktop
 IS_WEB = (sys.platform == "emscripten")
 
@@ -82,10 +106,9 @@ else:
     LEVELS_DIR = os.path.join(BASE_DIR, "levels")
 
 async def sleep_ms(ms: int):
-    if IS_WEB:
-        await asyncio.sleep(ms / 1000.0)
-    else:
-        pygame.time.delay(ms)
+    # Always an asyncio sleep: yields to the browser on pygbag and doesn't
+    # block the event loop with pygame.time.delay on desktop
+    await asyncio.sleep(ms / 1000.0)
 
 def load_image(path: str, fallback_size=(24,24), color=(200,200,200)):
     if os.path.exists(path):
@@ -96,6 +119,20 @@ def load_image(path: str, fallback_size=(24,24), color=(200,200,200)):
             pass
     s = pygame.Surface(fallback_size, pygame.SRCALPHA)
     pygame.draw.rect(s, color, (0,0,*fallback_size), border_radius=4)
+    return s.convert_alpha()  # same display format as a loaded PNG
+
+COLORKEY = (255, 0, 255)  # transparent colour for colorkeyed (non-alpha) sprites
+
+def _colorkeyed(img):
+    """Opaque display-format copy of an all-or-nothing alpha image, with
+    COLORKEY + RLE for the holes (cheaper to blit than per-pixel alpha).
+    Images with soft edges, or that already use COLORKEY, are returned as is."""
+    if pygame.mask.from_surface(img, 0).count() != pygame.mask.from_surface(img, 254).count():
+        return img
+    if pygame.mask.from_threshold(img, (*COLORKEY, 255), (1, 1, 1, 255)).count():
+        return img
+    s = pygame.Surface(img.get_size()).convert(); s.fill(COLORKEY); s.blit(img, (0, 0))
+    s.set_colorkey(COLORKEY, pygame.RLEACCEL)
     return s
 
 def load_explosion_frames(folder="assets", prefix="explosion_", count=6):
@@ -104,46 +141,75 @@ def load_explosion_frames(folder="assets", prefix="explosion_", count=6):
         p = os.path.join(folder, f"{prefix}{i}.png")
         if os.path.exists(p):
             try:
-                frames.append(pygame.image.load(p).convert_alpha())
+                frames.append(_colorkeyed(pygame.image.load(p).convert_alpha()))
             except Exception:
                 pass
     if not frames:
         for i in range(count):
             r = 10 + i*3
-            s = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
+            # flat-colour circles: draw straight onto a keyed display surface
+            s = pygame.Surface((r*2, r*2)).convert(); s.fill(COLORKEY)
             pygame.draw.circle(s, (255,200,50), (r,r), r-1)
             pygame.draw.circle(s, (255,120,20), (r,r), max(1,r-4), 3)
             if i%2==0:
                 pygame.draw.circle(s, (255,255,255), (r,r), max(1,r-8), 2)
+            s.set_colorkey(COLORKEY, pygame.RLEACCEL)
             frames.append(s)
     return frames
 
+_RUN_RE = re.compile(r"([^ .\t])\1*")  # maximal run of one non-empty level letter
+_DIGITS_RE = re.compile(r"\d+")  # level number = every digit in the file name, joined
+
 def load_level_grid(path: str) -> list[str]:
     with open(path, "r", encoding="utf-8") as f:
-        lines = [line.rstrip("\\n") for line in f]
-    maxw = max((len(l) for l in lines), default=0)
-    norm = [(l + " " * max(0, maxw - len(l)))[:maxw] for l in lines]
-    return norm
+        lines = f.read().splitlines()
+    maxw = max(map(len, lines), default=0)
+    return [l.ljust(maxw) for l in lines]
 
 def connected_components(grid: list[str]) -> list[dict]:
+    # Union-find over horizontal runs: each row is split into runs of one
+    # letter (regex scan, C speed), a run is unioned with the same-letter runs
+    # of the row above that share a column (4-connectivity), then runs are
+    # folded into per-root bbox/area. Work scales with runs, not cells.
     if not grid: return []
-    R, C = len(grid), len(grid[0])
-    visited = [[False]*C for _ in range(R)]
-    comps = []
-    for r in range(R):
-        for c in range(C):
-            ch = grid[r][c]
-            if ch not in (" ", ".", "\\t") and not visited[r][c]:
-                stack=[(r,c)]; visited[r][c]=True; cells=[]
-                while stack:
-                    rr,cc=stack.pop(); cells.append((rr,cc))
-                    for dr,dc in ((1,0),(-1,0),(0,1),(0,-1)):
-                        nr,nc=rr+dr,cc+dc
-                        if 0<=nr<R and 0<=nc<C and not visited[nr][nc] and grid[nr][nc]==ch:
-                            visited[nr][nc]=True; stack.append((nr,nc))
-                rows=[rr for rr,_ in cells]; cols=[cc for _,cc in cells]
-                comps.append({"letter":ch,"cells":cells,"min_r":min(rows),"max_r":max(rows),
-                              "min_c":min(cols),"max_c":max(cols),"area":len(cells)})
+    runs = []    # run_id -> (r, c0, c1_exclusive, letter)
+    parent = []
+
+    def find(x):
+        root = x
+        while parent[root] != root: root = parent[root]
+        while parent[x] != root: parent[x], x = root, parent[x]
+        return root
+
+    prev = []
+    for r, line in enumerate(grid):
+        cur = []
+        for m in _RUN_RE.finditer(line):
+            rid = len(runs); c0, c1 = m.span(); ch = m.group(1)
+            runs.append((r, c0, c1, ch)); parent.append(rid); cur.append((rid, c0, c1, ch))
+        # both rows are sorted by column: walk them together
+        i = j = 0
+        while i < len(prev) and j < len(cur):
+            pid, p0, p1, pch = prev[i]; cid, q0, q1, qch = cur[j]
+            if p0 < q1 and q0 < p1 and pch == qch:
+                a, b = find(pid), find(cid)
+                if a != b: parent[max(a, b)] = min(a, b)
+            if p1 <= q1: i += 1
+            else: j += 1
+        prev = cur
+
+    comps = []; by_root = {}
+    for rid, (r, c0, c1, ch) in enumerate(runs):  # row-major, so first-seen order matches a cell scan
+        root = find(rid)
+        comp = by_root.get(root)
+        if comp is None:
+            comp = by_root[root] = {"letter":ch,"min_r":r,"max_r":r,
+                                    "min_c":c0,"max_c":c1 - 1,"area":0}
+            comps.append(comp)
+        comp["area"] += c1 - c0
+        comp["max_r"] = r  # rows only grow
+        if c0 < comp["min_c"]: comp["min_c"] = c0
+        if c1 - 1 > comp["max_c"]: comp["max_c"] = c1 - 1
     comps.sort(key=lambda d:d["min_r"])
     return comps
 
@@ -173,46 +239,42 @@ class TouchControls:
         pygame.draw.circle(self._joy_base, (255,255,255,UI_ALPHA), (JOY_BASE_R, JOY_BASE_R), JOY_BASE_R, 2)
         pygame.draw.circle(self._joy_knob, (255,255,255,UI_ALPHA), (JOY_KNOB_R, JOY_KNOB_R), JOY_KNOB_R)
 
-    # ------- helpers -------
-    @staticmethod
-    def _dist(ax, ay, bx, by):
-        dx, dy = ax-bx, ay-by
-        return math.hypot(dx, dy)
+        # event type -> handler; one dict lookup per event instead of an if/elif chain
+        self._dispatch = {
+            pygame.MOUSEBUTTONDOWN: self._on_mouse_down, pygame.MOUSEMOTION: self._on_mouse_motion,
+            pygame.MOUSEBUTTONUP: self._on_mouse_up,
+            pygame.FINGERDOWN: self._on_finger_down, pygame.FINGERMOTION: self._on_finger_motion,
+            pygame.FINGERUP: self._on_finger_up,
+        }
 
+    # ------- helpers -------
     def _which_zone(self, x, y):
         joy_pos, fire_pos = _ui_positions()
-        # fire first so taps near RH side don't grab stick
-        if self._dist(x, y, *fire_pos) <= 28:  # FIRE_R
+        # fire first so taps near RH side don't grab stick (squared distances, no sqrt)
+        dx = x - fire_pos[0]; dy = y - fire_pos[1]
+        if dx*dx + dy*dy <= _FIRE_R2:
             return "fire"
-        if self._dist(x, y, *joy_pos) <= JOY_BASE_R:
+        dx = x - joy_pos[0]; dy = y - joy_pos[1]
+        if dx*dx + dy*dy <= _JOY_R2:
             return "joy"
         return None
 
     def _update_joy_from(self, x, y):
         joy_pos, _ = _ui_positions()
-        dx = x - joy_pos[0]
-        dy = y - joy_pos[1]
-        # clamp to circle
-        mag = math.hypot(dx, dy)
-        if mag > 0:
-            nx = dx / max(1e-6, JOY_BASE_R)
-            ny = dy / max(1e-6, JOY_BASE_R)
-            # stick vector normalized to [-1,1] within base radius
-            l = math.hypot(nx, ny)
-            if l > 1.0:
-                nx /= l; ny /= l
-        else:
-            nx = ny = 0.0
-        # deadzone
-        if math.hypot(nx, ny) < JOY_DEADZONE:
+        # stick vector normalized to [-1,1] within base radius; one squared
+        # length drives both the clamp to the circle and the deadzone
+        nx = (x - joy_pos[0]) / JOY_BASE_R
+        ny = (y - joy_pos[1]) / JOY_BASE_R
+        l2 = nx*nx + ny*ny
+        if l2 > 1.0:
+            inv = l2 ** -0.5; nx *= inv; ny *= inv
+        elif l2 < JOY_DEADZONE * JOY_DEADZONE:
             nx = ny = 0.0
-        self.joy_vec = (max(-1.0, min(1.0, nx)), max(-1.0, min(1.0, ny)))
-        # Convenience: single-entry dispatcher so Game can just forward events
+        self.joy_vec = (nx, ny)
+    # Convenience: single-entry dispatcher so Game can just forward events
     def handle_event(self, e):
-        if e.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION):
-            self.handle_mouse_event(e)
-        elif e.type in (pygame.FINGERDOWN, pygame.FINGERMOTION, pygame.FINGERUP):
-            self.handle_finger_event(e)
+        h = self._dispatch.get(e.type)
+        if h: h(e)
 
     # Back-compat with your Game.update() calls
     def get_vector(self):
@@ -222,58 +284,50 @@ class TouchControls:
     def is_firing(self):
         return self.fire_held
     # ------- public API for events -------
-    def handle_mouse_event(self, e):
-        # Treat mouse as pointer id = -1
-        if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
-            x, y = e.pos
-            k = self._which_zone(x, y)
-            if k:
-                self.active[-1] = {"kind": k}
-                if k == "joy":
-                    self._update_joy_from(x, y)
-                elif k == "fire":
-                    self.fire_held = True
-
-        elif e.type == pygame.MOUSEMOTION:
-            if -1 in self.active and self.active[-1]["kind"] == "joy":
-                self._update_joy_from(*e.pos)
-
-        elif e.type == pygame.MOUSEBUTTONUP and e.button == 1:
-            if -1 in self.active:
-                kind = self.active[-1]["kind"]
-                del self.active[-1]
-                if kind == "joy":
-                    self.joy_vec = (0.0, 0.0)
-                elif kind == "fire":
-                    self.fire_held = False
-
-    def handle_finger_event(self, e):
-        # e.x, e.y are normalized [0..1] in pygbag
-        pid = int(e.finger_id) if hasattr(e, "finger_id") else int(e.touch_id)
-        x = int(e.x * WIDTH)
-        y = int(e.y * HEIGHT)
-
-        if e.type == pygame.FINGERDOWN:
-            k = self._which_zone(x, y)
-            if k:
-                self.active[pid] = {"kind": k}
-                if k == "joy":
-                    self._update_joy_from(x, y)
-                elif k == "fire":
-                    self.fire_held = True
-
-        elif e.type == pygame.FINGERMOTION:
-            if pid in self.active and self.active[pid]["kind"] == "joy":
+    # (both route through the same table as handle_event)
+    handle_mouse_event = handle_event
+    handle_finger_event = handle_event
+
+    # ------- pointer handlers (mouse is pointer id -1) -------
+    def _pointer_down(self, pid, x, y):
+        k = self._which_zone(x, y)
+        if k:
+            self.active[pid] = {"kind": k}
+            if k == "joy":
                 self._update_joy_from(x, y)
+            elif k == "fire":
+                self.fire_held = True
+
+    def _pointer_motion(self, pid, x, y):
+        if pid in self.active and self.active[pid]["kind"] == "joy":
+            self._update_joy_from(x, y)
+
+    def _pointer_up(self, pid):
+        if pid in self.active:
+            kind = self.active.pop(pid)["kind"]
+            if kind == "joy":
+                self.joy_vec = (0.0, 0.0)
+            elif kind == "fire":
+                self.fire_held = False
+
+    def _on_mouse_down(self, e):
+        if e.button == 1: self._pointer_down(-1, *e.pos)
+    def _on_mouse_motion(self, e):
+        self._pointer_motion(-1, *e.pos)
+    def _on_mouse_up(self, e):
+        if e.button == 1: self._pointer_up(-1)
 
-        elif e.type == pygame.FINGERUP:
-            if pid in self.active:
-                kind = self.active[pid]["kind"]
-                del self.active[pid]
-                if kind == "joy":
-                    self.joy_vec = (0.0, 0.0)
-                elif kind == "fire":
-                    self.fire_held = False
+    @staticmethod
+    def _finger(e):
+        # e.x, e.y are normalized [0..1] in pygbag
+        pid = int(e.finger_id) if hasattr(e, "finger_id") else int(e.touch_id)
+        return pid, int(e.x * WIDTH), int(e.y * HEIGHT)
+    def _on_finger_down(self, e):
+        self._pointer_down(*self._finger(e))
+    def _on_finger_motion(self, e):
+        self._pointer_motion(*self._finger(e))
+    def _on_finger_up(self, e):
+        self._pointer_up(self._finger(e)[0])
 
     # ------- polling -------
     def get_axis(self):
@@ -284,6 +338,12 @@ class TouchControls:
         return self.fire_held
 
     # ------- draw -------
+    def dirty_rects(self):
+        # screen areas the widgets can change (knob moves inside the base circle)
+        joy_pos, fire_pos = _ui_positions()
+        return [pygame.Rect(joy_pos[0] - JOY_BASE_R, joy_pos[1] - JOY_BASE_R, JOY_BASE_R*2, JOY_BASE_R*2),
+                pygame.Rect(fire_pos[0] - FIRE_R, fire_pos[1] - FIRE_R, FIRE_R*2, FIRE_R*2)]
+
     def draw(self, surf):
         joy_pos, fire_pos = _ui_positions()
         # draw fire button (build once at scale)
@@ -310,18 +370,32 @@ class ScrollingBackground:
         self.speed = float(speed)
         self.loop = loop
         self.offset = 0.0  # float for sub-pixel scroll
+        self.pixel_moved = True  # did the last update() shift the drawn image by >= 1px?
         self.heights = [s.get_height() for s in self.segs]
         self.total_h = sum(self.heights)
+        self.cum = list(accumulate(self.heights))  # segment end offsets, for bisect in draw()
+        self.seg_count = len(self.segs)
+        # One tall pre-composited strip lets draw() get away with <= 2 blits a
+        # frame; only when it covers the screen and stays a sane size in memory
+        self.strip = None
+        if HEIGHT <= self.total_h <= BG_STRIP_MAX_H:
+            if self.seg_count == 1:
+                self.strip = self.segs[0]
+            else:
+                self.strip = pygame.Surface((WIDTH, self.total_h)).convert()
+                for seg, top in zip(self.segs, [0] + self.cum[:-1]): self.strip.blit(seg, (0, top))
 
     def update(self, dt):
         if not self.segs or self.total_h <= 0:
             return
         # Move terrain DOWN the screen
+        old_px = int(self.offset)
         self.offset -= self.speed * dt
         if self.loop:
             self.offset %= self.total_h
         else:
             self.offset = max(0.0, min(self.offset, float(max(0, self.total_h - HEIGHT))))
+        self.pixel_moved = int(self.offset) != old_px
 
     def draw(self, surf):
         if not self.segs:
@@ -331,35 +405,38 @@ class ScrollingBackground:
         # Normalize offset
         off = (self.offset % self.total_h) if self.loop else max(0.0, min(self.offset, float(max(0, self.total_h - HEIGHT))))
 
+        if self.strip is not None:
+            y = -int(off); surf.blit(self.strip, (0, y))
+            if self.loop and y + self.total_h < HEIGHT:
+                surf.blit(self.strip, (0, y + self.total_h))  # wrap-around
+            return
+
         # Find starting segment index and y inside it
-        idx = 0
-        remaining = off
-        while remaining >= self.heights[idx]:
-            remaining -= self.heights[idx]
-            idx = (idx + 1) % len(self.segs) if self.loop else min(idx + 1, len(self.segs) - 1)
+        idx = min(bisect_right(self.cum, off), self.seg_count - 1)
+        remaining = off - (self.cum[idx - 1] if idx else 0)
 
         # Start drawing so that the first segment begins at y = -remaining
         y = -int(remaining)
         i = idx
+        segs = self.segs; heights = self.heights; n = self.seg_count; loop = self.loop; blit = surf.blit
         # Blit until the screen is filled
         while y < HEIGHT:
-            seg = self.segs[i % len(self.segs)] if self.loop else self.segs[min(i, len(self.segs) - 1)]
-            surf.blit(seg, (0, y))
-            y += seg.get_height()
+            k = i % n if loop else min(i, n - 1)
+            blit(segs[k], (0, y))
+            y += heights[k]
             i += 1
-            if not self.loop and (i >= len(self.segs) and y >= HEIGHT):
+            if not loop and (i >= n and y >= HEIGHT):
                 break
 
-def _extract_level_number_from_path(path: str) -> int:
-    base = os.path.basename(path)
-    digits = ''.join(ch for ch in base if ch.isdigit())
-    try:
-        return int(digits) if digits else 1
-    except ValueError:
-        return 1
+def _extract_level_number_from_path(path: str, default: int = 1) -> int:
+    digits = ''.join(_DIGITS_RE.findall(os.path.basename(path)))
+    return int(digits) if digits else default
+
+_BG_SEG_CACHE = {}  # (path, mtime_ns) -> width-fitted segment, so replays skip decode + resize
 
-def load_level_background(level_number: int) -> ScrollingBackground:
-    segs = []
+def _decode_bg_segments(level_number: int) -> list:
+    """Load + width-fit the PNG segments for a level, without touching the display.
+    Safe to run on a worker thread (decode and scaling happen in SDL's C code)."""
     seg_paths = []
     idx = 1
     while True:
@@ -375,15 +452,31 @@ def load_level_background(level_number: int) -> ScrollingBackground:
             seg_paths.append(p)
 
     # Load + rescale each segment to exactly WIDTH, keeping aspect ratio
+    raw = []
     for p in seg_paths:
-        img = load_image(p)
-        if img.get_width() != WIDTH:
-            new_h = max(1, int(img.get_height() * (WIDTH / img.get_width())))
-            img = pygame.transform.smoothscale(img, (WIDTH, new_h))
-        segs.append(img)
+        try:
+            key = (p, os.stat(p).st_mtime_ns)
+            img = _BG_SEG_CACHE.get(key)
+            if img is None:
+                img = pygame.image.load(p); w = img.get_width()
+                if w != WIDTH:
+                    new_h = max(1, int(img.get_height() * (WIDTH / w)))
+                    if WIDTH % w == 0 or w % WIDTH == 0:
+                        img = pygame.transform.scale(img, (WIDTH, new_h))  # whole-number ratio: nearest is exact enough
+                    else:
+                        if img.get_bitsize() < 24: img = img.convert(32)  # smoothscale needs 24/32-bit
+                        img = pygame.transform.smoothscale(img, (WIDTH, new_h))
+                _BG_SEG_CACHE[key] = img
+        except Exception:
+            continue
+        raw.append(img)
+    return raw
 
-    # Visible fallback tile (green land, lakes, forest blobs)
-    if not segs:
+_FALLBACK_TILE = None  # generated once, shared by every level without background PNGs
+
+def _fallback_tile():
+    global _FALLBACK_TILE
+    if _FALLBACK_TILE is None:
         tile = pygame.Surface((WIDTH, HEIGHT))
         tile.fill((26, 46, 26))
         for _ in range(10):
@@ -394,7 +487,18 @@ def load_level_background(level_number: int) -> ScrollingBackground:
             rx = random.randint(0, WIDTH-80)
             ry = random.randint(0, HEIGHT-50)
             pygame.draw.rect(tile, (34, 90, 34), (rx, ry, 70, 36), border_radius=10)
-        segs.append(tile)
+        _FALLBACK_TILE = tile.convert()
+    return _FALLBACK_TILE
+
+def load_level_background(level_number: int, raw_segs=None) -> ScrollingBackground:
+    # raw_segs: result of _decode_bg_segments (e.g. prefetched on a worker thread)
+    if raw_segs is None: raw_segs = _decode_bg_segments(level_number)
+    # Backgrounds are opaque: match the display format so blits take SDL's fast path
+    segs = [img.convert() for img in raw_segs]
+
+    # Visible fallback tile (green land, lakes, forest blobs)
+    if not segs:
+        segs.append(_fallback_tile())
         print(f"[BG] Level {level_number}: no PNGs found, using fallback tile")
 
     base_speed = 50  # tweak speed here
@@ -406,128 +510,230 @@ def load_level_background(level_number: int) -> ScrollingBackground:
     return bg
 
 # ------------ Entities --------------
+class FastGroup(pygame.sprite.Group):
+    """Sprite group that exposes its (image, rect) pairs, so render() can hand
+    every group to SDL in one blits() call."""
+    def blit_sequence(self):
+        # spritedict is the group's own storage; no snapshot copy needed to read it
+        return [(sp.image, sp.rect) for sp in self.spritedict]
+
+# Shared (flyweight) images: sprites never draw into their own image, so every
+# bullet of a colour and every drop of a kind can blit the same Surface.
+# Stored in display format; prewarm_sprite_surfaces() builds them right after
+# set_mode, and the getters still fill any gap lazily.
+_BULLET_SURFS: dict[tuple, pygame.Surface] = {}
+_DROP_SURFS: dict[str, pygame.Surface] = {}
+
+def _bullet_surf(color, size=(4, 10)):
+    key = (tuple(color), size)
+    s = _BULLET_SURFS.get(key)
+    if s is None:
+        s = pygame.Surface(size, pygame.SRCALPHA)
+        s.fill(color)
+        s = _BULLET_SURFS[key] = s.convert_alpha()
+    return s
+
+def _drop_surf(kind: str):
+    s = _DROP_SURFS.get(kind)
+    if s is not None:
+        return s
+    s = pygame.Surface((16, 16), pygame.SRCALPHA)
+    if kind == "health":
+        pygame.draw.rect(s, GREEN, (0,0,16,16), border_radius=3)
+        pygame.draw.line(s, WHITE, (8,2),(8,14), 2)
+        pygame.draw.line(s, WHITE, (2,8),(14,8), 2)
+    elif kind == "ammo":
+        pygame.draw.rect(s, BLUE, (0,0,16,16), border_radius=3)
+        pygame.draw.rect(s, WHITE, (6,3,4,10))
+    elif kind == "enhanced":
+        pygame.draw.rect(s, YELLOW, (0,0,16,16), border_radius=3)
+        pygame.draw.circle(s, WHITE, (8,8), 5, 2)
+    elif kind == "fan":
+        pygame.draw.rect(s, YELLOW, (0,0,16,16), border_radius=3)
+        pygame.draw.line(s, WHITE, (3,13), (13,3), 2)
+        pygame.draw.line(s, WHITE, (3,3), (13,13), 1)
+    else:
+        pygame.draw.rect(s, YELLOW, (0,0,16,16), border_radius=3)
+    s = _DROP_SURFS[kind] = _colorkeyed(s.convert_alpha())  # flat shapes, hard edges
+    return s
+
+def prewarm_sprite_surfaces():
+    # Draw every bullet colour and drop kind once up front, so the first kill
+    # or shot of a kind never pays for the pygame.draw calls mid-frame
+    for color in (YELLOW, WHITE): _bullet_surf(color)
+    for kind in DROP_KINDS: _drop_surf(kind)
+
 class Bullet(pygame.sprite.Sprite):
+    # Sprite itself has no __slots__, so instances keep a __dict__ (for
+    # Sprite's own bookkeeping); the slots make our hot fields direct offsets.
+    __slots__ = ("image", "rect", "fx", "fy", "vx", "vy", "friendly")
+    _pool = []  # killed bullets waiting to be reused by spawn()
     def __init__(self, x, y, vy, color=YELLOW, friendly=True, vx=0.0):
         super().__init__()
-        self.image = pygame.Surface((4, 10), pygame.SRCALPHA)
-        self.image.fill(color)
+        self.image = _bullet_surf(color)
         self.rect = self.image.get_rect(center=(x, y))
+        self.fx = float(x); self.fy = float(y)  # sub-pixel centre; rect follows it
         self.vx = vx
         self.vy = vy
         self.friendly = friendly
 
+    @classmethod
+    def spawn(cls, x, y, vy, color=YELLOW, friendly=True, vx=0.0):
+        if not cls._pool: return cls(x, y, vy, color=color, friendly=friendly, vx=vx)
+        b = cls._pool.pop()
+        b.image = _bullet_surf(color); b.rect.center = (x, y)  # all bullet surfs share one size
+        b.fx = float(x); b.fy = float(y); b.vx = vx; b.vy = vy; b.friendly = friendly
+        return b
+
+    def kill(self):
+        # Only a live bullet goes back, so a second kill() can't pool it twice
+        if self.alive(): super().kill(); Bullet._pool.append(self)
+
     def update(self, dt):
-        self.rect.x += int(self.vx * dt)
-        self.rect.y += int(self.vy * dt)
-        if (self.rect.bottom < 0 or self.rect.top > HEIGHT
-                or self.rect.right < 0 or self.rect.left > WIDTH):
-            self.kill()
+        self.fx += self.vx * dt; self.fy += self.vy * dt
+        self.rect.center = (int(self.fx), int(self.fy))
 
 class Drop(pygame.sprite.Sprite):
+    __slots__ = ("kind", "image", "rect", "fy", "vy")
+    _pool = []  # collected/expired drops waiting to be reused by spawn()
     def __init__(self, x, y, kind: str):
         super().__init__(); self.kind = kind
-        self.image = pygame.Surface((16, 16), pygame.SRCALPHA)
-        if kind == "health":
-            pygame.draw.rect(self.image, GREEN, (0,0,16,16), border_radius=3)
-            pygame.draw.line(self.image, WHITE, (8,2),(8,14), 2)
-            pygame.draw.line(self.image, WHITE, (2,8),(14,8), 2)
-        elif kind == "ammo":
-            pygame.draw.rect(self.image, BLUE, (0,0,16,16), border_radius=3)
-            pygame.draw.rect(self.image, WHITE, (6,3,4,10))
-        elif kind == "enhanced":
-            pygame.draw.rect(self.image, YELLOW, (0,0,16,16), border_radius=3)
-            pygame.draw.circle(self.image, WHITE, (8,8), 5, 2)
-        elif kind == "fan":
-            pygame.draw.rect(self.image, YELLOW, (0,0,16,16), border_radius=3)
-            pygame.draw.line(self.image, WHITE, (3,13), (13,3), 2)
-            pygame.draw.line(self.image, WHITE, (3,3), (13,13), 1)
-        else:
-            pygame.draw.rect(self.image, YELLOW, (0,0,16,16), border_radius=3)
+        self.image = _drop_surf(kind)
         self.rect = self.image.get_rect(center=(x,y))
+        self.fy = float(y)
         self.vy = 60
 
+    @classmethod
+    def spawn(cls, x, y, kind: str):
+        if not cls._pool: return cls(x, y, kind)
+        d = cls._pool.pop()
+        d.kind = kind; d.image = _drop_surf(kind); d.rect.center = (x, y)  # all drop surfs are 16x16
+        d.fy = float(y); d.vy = 60
+        return d
+
+    def kill(self):
+        if self.alive(): super().kill(); Drop._pool.append(self)
+
     def update(self, dt):
-        self.rect.y += int(self.vy * dt)
-        if self.rect.top > HEIGHT: self.kill()
+        self.fy += self.vy * dt; self.rect.centery = int(self.fy)
 
 class Explosion(pygame.sprite.Sprite):
+    __slots__ = ("frames", "index", "time_per", "t", "image", "rect")
+    _pool = []  # finished explosions waiting to be reused by spawn()
     def __init__(self, x, y, frames, fps=24):
         super().__init__()
         self.frames = frames; self.index = 0; self.time_per = 1.0 / fps; self.t = 0.0
         self.image = self.frames[0]; self.rect = self.image.get_rect(center=(x,y))
+
+    @classmethod
+    def spawn(cls, x, y, frames, fps=24):
+        if not cls._pool: return cls(x, y, frames, fps)
+        ex = cls._pool.pop()
+        ex.frames = frames; ex.index = 0; ex.time_per = 1.0 / fps; ex.t = 0.0
+        ex.image = frames[0]; r = ex.rect; r.size = ex.image.get_size(); r.center = (x, y)
+        return ex
+
+    def kill(self):
+        if self.alive(): super().kill(); Explosion._pool.append(self)
     def update(self, dt):
         self.t += dt
         while self.t >= self.time_per:
             self.t -= self.time_per; self.index += 1
             if self.index >= len(self.frames): self.kill(); return
-            center = self.rect.center; self.image = self.frames[self.index]
-            self.rect = self.image.get_rect(center=center)
+            # resize the existing rect about its centre instead of allocating a new one
+            r = self.rect; center = r.center; self.image = self.frames[self.index]
+            r.size = self.image.get_size(); r.center = center
 
 class Enemy(pygame.sprite.Sprite):
+    __slots__ = ("base_image", "image", "rect", "fx", "fy", "hp", "vy", "fire_t", "time", "_space_key")
     def __init__(self, x, y, img: pygame.Surface, hp=2):
-        super().__init__(); self.base_image = img; self.image = img.copy()
-        self.rect = self.image.get_rect(center=(x,y))
+        super().__init__(); self.base_image = img; self.image = img  # shared, never drawn into
+        self.rect = self.image.get_rect(center=(x,y)); self.fx = float(x); self.fy = float(y)
         self.hp = hp; self.vy = ENEMY_BASE_SPEED; self.fire_t = random.uniform(*ENEMY_FIRE_COOLDOWN); self.time = 0.0
-    def update(self, dt):
-        self.time += dt; self.rect.y += int(self.vy * dt)
-        if self.rect.top > HEIGHT: self.kill()
+        self._space_key = None  # bookkeeping owned by Game.enemy_space
+    def update(self, dt, bullets_group=None):  # same signature for every enemy; only shooters fire
+        self.time += dt; self.fy += self.vy * dt; self.rect.centery = int(self.fy)
     def damage(self, dmg=1):
         self.hp -= dmg
         if self.hp <= 0: self.kill(); return True
         return False
     def maybe_drop(self, drops_group):
         if random.random() < DROP_CHANCE:
-            pool = []
-            for k, w in DROP_WEIGHTS.items():
-                pool.extend([k] * int(max(1, w)))
-            kind = random.choice(pool)
-            drops_group.add(Drop(self.rect.centerx, self.rect.centery, kind))
+            kind = random.choices(DROP_KINDS, cum_weights=DROP_CUM, k=1)[0]
+            drops_group.add(Drop.spawn(self.rect.centerx, self.rect.centery, kind))
 
 class ShooterEnemy(Enemy):
+    __slots__ = ("target_ref",)
     def __init__(self, x, y, img, hp=3):
         super().__init__(x, y, img, hp)
         self.target_ref = None
 
     def update(self, dt, bullets_group=None):
         if self.target_ref is not None:
-            dx = self.target_ref.rect.centerx - self.rect.centerx
+            dx = self.target_ref.rect.centerx - self.fx
             vx = max(-SHOOTER_HMOVE_SPEED, min(SHOOTER_HMOVE_SPEED, dx * SHOOTER_TRACK_GAIN))
-            self.rect.x += int(vx * dt)
-            if self.rect.left < 0: self.rect.left = 0
-            if self.rect.right > WIDTH: self.rect.right = WIDTH
+            half_w = self.rect.width / 2
+            self.fx = max(half_w, min(WIDTH - half_w, self.fx + vx * dt))
+            self.rect.centerx = int(self.fx)
         super().update(dt)
         self.fire_t -= dt
         if bullets_group is not None and self.fire_t <= 0:
             self.fire_t = random.uniform(*ENEMY_FIRE_COOLDOWN)
-            bullets_group.add(Bullet(self.rect.centerx, self.rect.bottom, ENEMY_BULLET_SPEED, color=WHITE, friendly=False))
+            bullets_group.add(Bullet.spawn(self.rect.centerx, self.rect.bottom, ENEMY_BULLET_SPEED, color=WHITE, friendly=False))
 
 class KamikazeEnemy(Enemy):
+    __slots__ = ("target_ref", "locked")
     def __init__(self, x, y, img, hp=2):
         super().__init__(x, y, img, hp)
         self.vy = KAMIKAZE_SPEED
         self.target_ref = None
         self.locked = False
 
-    def update(self, dt):
+    def update(self, dt, bullets_group=None):
         if self.target_ref is not None:
             px, py = self.target_ref.rect.center
-            dx = px - self.rect.centerx
-            dy = py - self.rect.centery
+            dx = px - self.fx
+            dy = py - self.fy
             if abs(dx) < KAMIKAZE_LOCK_DX and 0 < dy < KAMIKAZE_LOCK_DY:
                 self.locked = True
             fwd = self.vy + (KAMIKAZE_BOOST if self.locked else 0.0)
-            d = max(1.0, math.hypot(dx, dy))
-            vx = (dx / d) * 100.0
-            vy = (dy / d) * fwd / (KAMIKAZE_SPEED / 100.0)
-            self.rect.x += int(vx * dt)
-            self.rect.y += int(vy * dt)
+            # 1/max(1, |d|) from the squared distance: no hypot call, no divides
+            d2 = dx*dx + dy*dy
+            inv = d2 ** -0.5 if d2 > 1.0 else 1.0
+            vx = dx * inv * 100.0
+            vy = dy * inv * fwd * KAMIKAZE_SPEED_INV_100
+            self.fx += vx * dt; self.fy += vy * dt
         else:
-            self.rect.y += int(self.vy * dt)
-        if self.rect.top > HEIGHT or self.rect.right < 0 or self.rect.left > WIDTH:
-            self.kill()
+            self.fy += self.vy * dt
+        self.rect.center = (int(self.fx), int(self.fy))
 
 class BigEnemy(Enemy):
-    def __init__(self, x, y, base_img, w_cells, h_cells, cell_w, cell_h, shooter_img):
+    __slots__ = ()
+    _scale_cache = {}  # (source image, w, h) -> scaled boss image, shared by every level
+    def __init__(self, x, y, img, w_cells, h_cells):
+        # img is already scaled to target_size() (LevelTimeline pre-scales per level)
+        # HP scaled to component area, with a floor
+        hp = max(6, 4 + (w_cells * h_cells) // 2)
+        super().__init__(x, y, img, hp=hp)
+        self.vy = ENEMY_BASE_SPEED * 0.75
+
+        # keep inside screen horizontally
+        if self.rect.left < 0: self.rect.left = 0
+        if self.rect.right > WIDTH: self.rect.right = WIDTH
+        self.fx = float(self.rect.centerx)
+
+    @classmethod
+    def scaled_image(cls, base_img, size):
+        # Memoised per source image and exact target size. Surfaces hash by
+        # identity, and the key keeps the source alive, so ids are never reused.
+        # smoothscale keeps the source's (display alpha) pixel format.
+        w, h = size; key = (base_img, w, h)
+        img = cls._scale_cache.get(key)
+        if img is None: img = cls._scale_cache[key] = pygame.transform.smoothscale(base_img, (w, h))
+        return img
+
+    @staticmethod
+    def target_size(base_img, w_cells, h_cells, cell_w, cell_h, shooter_img):
         # Desired bbox from component
         bbox_w = max(int(w_cells * cell_w * BIG_PADDING), BIG_MIN_ABS_W)
         bbox_h = max(int(h_cells * cell_h * BIG_PADDING), BIG_MIN_ABS_H)
@@ -551,52 +757,63 @@ class BigEnemy(Enemy):
             scale = min(bbox_w / bw, bbox_h / bh)
             target_w = max(1, int(bw * scale))
             target_h = max(1, int(bh * scale))
-
-        img2 = pygame.transform.smoothscale(base_img, (target_w, target_h))
-
-        # HP scaled to component area, with a floor
-        hp = max(6, 4 + (w_cells * h_cells) // 2)
-        super().__init__(x, y, img2, hp=hp)
-        self.vy = ENEMY_BASE_SPEED * 0.75
-
-        # keep inside screen horizontally
-        if self.rect.left < 0: self.rect.left = 0
-        if self.rect.right > WIDTH: self.rect.right = WIDTH
+        return target_w, target_h
 
 
 class Player(pygame.sprite.Sprite):
+    __slots__ = ("base_image", "image", "rect", "fx", "fy", "speed", "lives", "invuln_t", "shoot_t",
+                 "ammo", "enhanced_until", "fan_until", "_shoot_fn", "_next_fn_check")
     def __init__(self, x, y, img):
         super().__init__(); self.base_image = img; self.image = self.base_image.copy()
-        self.rect = self.image.get_rect(center=(x,y)); self.speed = PLAYER_SPEED; self.lives = PLAYER_START_LIVES
+        self.rect = self.image.get_rect(center=(x,y)); self.fx = float(x); self.fy = float(y)
+        self.speed = PLAYER_SPEED; self.lives = PLAYER_START_LIVES
         self.invuln_t = 0.0; self.shoot_t = 0.0; self.ammo = 9999; self.enhanced_until = 0.0
         self.fan_until = 0.0 
+        self._shoot_fn = self._shoot_basic; self._next_fn_check = 0.0  # cached fire pattern, re-picked on grant/expiry
     def has_enhanced(self, now: float) -> bool: return now < self.enhanced_until
-    def grant_enhanced(self, now: float): self.enhanced_until = max(self.enhanced_until, now + ENHANCED_WEAPON_DURATION)
+    def grant_enhanced(self, now: float): self.enhanced_until = max(self.enhanced_until, now + ENHANCED_WEAPON_DURATION); self._next_fn_check = 0.0
     def has_fan(self, now: float) -> bool: return now < self.fan_until
-    def grant_fan(self, now: float): self.fan_until = max(self.fan_until, now + ENHANCED_WEAPON_DURATION)
-    def update(self, dt, keys):
-        vx = vy = 0.0
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]: vx -= self.speed
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]: vx += self.speed
-        if keys[pygame.K_UP] or keys[pygame.K_w]: vy -= self.speed
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]: vy += self.speed
-        self.rect.x += int(vx * dt); self.rect.y += int(vy * dt)
-        self.rect.clamp_ip(pygame.Rect(0,0,WIDTH,HEIGHT))
+    def grant_fan(self, now: float): self.fan_until = max(self.fan_until, now + ENHANCED_WEAPON_DURATION); self._next_fn_check = 0.0
+    def move(self, dx, dy):
+        # Accumulate in floats so slow/short frames don't lose sub-pixel motion
+        self.fx += dx; self.fy += dy
+        self.rect.center = (int(self.fx), int(self.fy))
+        if not SCREEN_RECT.contains(self.rect):
+            self.rect.clamp_ip(SCREEN_RECT); self.fx, self.fy = self.rect.center
+    def place(self, x, y):
+        self.fx = float(x); self.fy = float(y); self.rect.center = (x, y)
+    def update(self, dt, keys, jx=0.0, jy=0.0):
+        # Keyboard axes as -1/0/+1 (bool arithmetic) plus the touch stick, one move
+        ax = (keys[_K_RIGHT] or keys[_K_D]) - (keys[_K_LEFT] or keys[_K_A]) + jx * JOY_SPEED_MULT
+        ay = (keys[_K_DOWN] or keys[_K_S]) - (keys[_K_UP] or keys[_K_W]) + jy * JOY_SPEED_MULT
+        if ax or ay: step = self.speed * dt; self.move(ax * step, ay * step)
         if self.invuln_t > 0: self.invuln_t -= dt
     def shoot(self, now: float, bullets_group):
         if self.shoot_t > now: return
         self.shoot_t = now + PLAYER_BULLET_COOLDOWN
-        cx, cy = self.rect.centerx, self.rect.top
-        if self.has_enhanced(now):
-            bullets_group.add(Bullet(cx,     cy, -PLAYER_BULLET_SPEED, color=YELLOW, friendly=True))
-            bullets_group.add(Bullet(cx - 10, cy, -PLAYER_BULLET_SPEED, color=YELLOW, friendly=True))
-            bullets_group.add(Bullet(cx + 10, cy, -PLAYER_BULLET_SPEED, color=YELLOW, friendly=True))
-        else:
-            bullets_group.add(Bullet(cx, cy, -PLAYER_BULLET_SPEED, color=YELLOW, friendly=True))
-        if self.has_fan(now):
-            diag = PLAYER_BULLET_SPEED / math.sqrt(2)
-            bullets_group.add(Bullet(cx, cy, -diag, color=YELLOW, friendly=True, vx=-diag))
-            bullets_group.add(Bullet(cx, cy, -diag, color=YELLOW, friendly=True, vx= diag))
+        if now >= self._next_fn_check: self._pick_shoot_fn(now)
+        self._shoot_fn(self.rect.centerx, self.rect.top, bullets_group)
+    def _pick_shoot_fn(self, now: float):
+        enh = self.has_enhanced(now); fan = self.has_fan(now)
+        self._shoot_fn = (self._shoot_enh_fan if enh and fan else self._shoot_enhanced if enh
+                          else self._shoot_fan if fan else self._shoot_basic)
+        # next time the pattern can change on its own is the earliest active expiry
+        self._next_fn_check = min([t for t in (self.enhanced_until, self.fan_until) if t > now], default=math.inf)
+
+    # ---- fire patterns ----
+    def _shoot_basic(self, cx, cy, bullets_group):
+        bullets_group.add(Bullet.spawn(cx, cy, -PLAYER_BULLET_SPEED, color=YELLOW, friendly=True))
+    def _shoot_enhanced(self, cx, cy, bullets_group):
+        bullets_group.add(Bullet.spawn(cx,     cy, -PLAYER_BULLET_SPEED, color=YELLOW, friendly=True),
+                          Bullet.spawn(cx - 10, cy, -PLAYER_BULLET_SPEED, color=YELLOW, friendly=True),
+                          Bullet.spawn(cx + 10, cy, -PLAYER_BULLET_SPEED, color=YELLOW, friendly=True))
+    def _shoot_fan(self, cx, cy, bullets_group):
+        self._shoot_basic(cx, cy, bullets_group); self._fan(cx, cy, bullets_group)
+    def _shoot_enh_fan(self, cx, cy, bullets_group):
+        self._shoot_enhanced(cx, cy, bullets_group); self._fan(cx, cy, bullets_group)
+    def _fan(self, cx, cy, bullets_group):
+        bullets_group.add(Bullet.spawn(cx, cy, -FAN_DIAG_SPEED, color=YELLOW, friendly=True, vx=-FAN_DIAG_SPEED),
+                          Bullet.spawn(cx, cy, -FAN_DIAG_SPEED, color=YELLOW, friendly=True, vx= FAN_DIAG_SPEED))
     def damage(self):
         if self.invuln_t > 0: return False
         self.lives -= 1; self.invuln_t = INVULN_AFTER_DEATH
@@ -605,7 +822,7 @@ class Player(pygame.sprite.Sprite):
 class SpawnEvent:
     def __init__(self, min_row, cx, cy, w_cells, h_cells, letter):
         self.min_row = min_row; self.cx = cx; self.cy = cy
-        self.w_cells = w_cells; self.h_cells = h_cells; self.letter = letter; self.spawned = False
+        self.w_cells = w_cells; self.h_cells = h_cells; self.letter = letter
 
 class LevelTimeline:
     def __init__(self, grid, assets):
@@ -617,54 +834,213 @@ class LevelTimeline:
             cminr,cmaxr=comp["min_r"],comp["max_r"]; cminc,cmaxc=comp["min_c"],comp["max_c"]
             center_c = (cminc + cmaxc + 1) / 2.0; w_cells = cmaxc - cminc + 1; h_cells = cmaxr - cminr + 1
             cx = int(center_c * self.cell_w); cy = -int(h_cells * self.cell_h) - 20
-            self.events.append(SpawnEvent(cminr, cx, cy, w_cells, h_cells, comp["letter"]))
+            # components stay case-sensitive (s and S never merge); only the factory lookup ignores case
+            self.events.append(SpawnEvent(cminr, cx, cy, w_cells, h_cells, comp["letter"].upper()))
         self.events.sort(key=lambda e:e.min_row)
-        self.row_timer = 0.0; self.row_index = 0; self.done_spawning = False; self.all_spawned_time = None
+        self.row_timer = 0; self.row_index = 0; self.done_spawning = False; self.all_spawned_time = None
+        self._next_idx = 0  # cursor into self.events (sorted by min_row)
         self.img_shooter = assets["enemy_shooter"]; self.img_kamikaze = assets["enemy_kamikaze"]; self.img_big = assets["enemy_big"]
-    def update(self, dt_ms, enemies_group, player_ref, enemy_bullets):
+        # Only 'B' maps to _make_big, so no other letter can become a BigEnemy
+        self._factories = {"S": self._make_shooter, "K": self._make_kamikaze, "B": self._make_big}
+        # Scale every BigEnemy size this level needs now, not in the middle of a spawn row
+        self.big_img_cache = {}  # (w_cells, h_cells) -> scaled image
+        for ev in self.events:
+            if ev.letter == "B" and ev.w_cells <= 12 and ev.h_cells <= 12: self._big_image(ev.w_cells, ev.h_cells)
+    def update(self, dt_ms, now, enemies_group, player_ref, enemy_bullets):
         self.row_timer += dt_ms
         while not self.done_spawning and self.row_timer >= SPAWN_ROW_MS * (self.row_index + 1):
             self.row_index += 1; target_row = self.row_index - 1
-            for ev in self.events:
-                if not ev.spawned and ev.min_row == target_row:
-                    ev.spawned = True; self._spawn_event(ev, enemies_group, player_ref, enemy_bullets)
+            events = self.events
+            while self._next_idx < len(events) and events[self._next_idx].min_row <= target_row:
+                ev = events[self._next_idx]; self._next_idx += 1
+                if ev.min_row == target_row: self._spawn_event(ev, enemies_group, player_ref, enemy_bullets)
         if not self.done_spawning and self.row_index >= self.R:
-            self.done_spawning = True; self.all_spawned_time = pygame.time.get_ticks()
+            self.done_spawning = True; self.all_spawned_time = now  # seconds, Game.now clock
     def _spawn_event(self, ev, enemies_group, player_ref, enemy_bullets):
-        letter = ev.letter.upper()
+        # Letters are upper-cased when the SpawnEvent is built; unknown ones spawn a plain Enemy
+        factory = self._factories.get(ev.letter, self._make_plain)
+        enemies_group.add(factory(ev, player_ref))
+
+    def _big_image(self, w_cells, h_cells):
+        img = self.big_img_cache.get((w_cells, h_cells))
+        if img is None:
+            size = BigEnemy.target_size(self.img_big, w_cells, h_cells, self.cell_w, self.cell_h, self.img_shooter)
+            img = self.big_img_cache[(w_cells, h_cells)] = BigEnemy.scaled_image(self.img_big, size)
+        return img
+
+    # ---- per-letter factories ----
+    def _make_plain(self, ev, player_ref):
+        return Enemy(ev.cx, ev.cy, self.img_shooter, hp=2)
+
+    def _make_shooter(self, ev, player_ref):
+        e = ShooterEnemy(ev.cx, ev.cy, self.img_shooter); e.target_ref = player_ref
+        return e
+
+    def _make_kamikaze(self, ev, player_ref):
+        e = KamikazeEnemy(ev.cx, ev.cy, self.img_kamikaze); e.target_ref = player_ref
+        return e
+
+    def _make_big(self, ev, player_ref):
+        # Guard against absurd components (just in case)
+        if ev.w_cells > 12 or ev.h_cells > 12:
+            if DEBUG_SPAWN:
+                print(f"[SPAWN] Suppressing giant BigEnemy {ev.w_cells}x{ev.h_cells} at row {ev.min_row}")
+            return self._make_plain(ev, player_ref)
+        e = BigEnemy(ev.cx, ev.cy, self._big_image(ev.w_cells, ev.h_cells), ev.w_cells, ev.h_cells)
+        if DEBUG_SPAWN:
+            print(f"[SPAWN] BigEnemy {ev.w_cells}x{ev.h_cells} at row {ev.min_row}, center=({ev.cx},{ev.cy})")
+        return e
+
+# ------------ Collision broad phase --------------
+_rect_of = attrgetter("rect")  # key for the Rect.collideobjects* narrow phase
+
+class CollisionSpace(Protocol):
+    """
+    Broad-phase index of sprites by rect. Implementations keep whatever
+    bookkeeping they need per sprite in ``sprite._space_key``.
+    """
+    def clear(self): ...
+    def add(self, sprite): ...
+    def move(self, sprite): ...
+    def remove(self, sprite): ...
+    def query_rect(self, rect): ...
 
-        # Safety: optionally *only* spawn BigEnemy when the map letter is 'B'
-        if ONLY_EXPLICIT_BOSS and letter != "B":
-            # Not a boss; fall through to regular types below
-            pass
-        elif letter == "B":
-            # Guard against absurd components (just in case)
-            if ev.w_cells > 12 or ev.h_cells > 12:
-                if DEBUG_SPAWN:
-                    print(f"[SPAWN] Suppressing giant BigEnemy {ev.w_cells}x{ev.h_cells} at row {ev.min_row}")
-                e = Enemy(ev.cx, ev.cy, self.img_shooter, hp=2)
+class SpatialHash:
+    """
+    Uniform grid of buckets keyed by (cell_x, cell_y). Sprites are filed
+    under every cell their rect overlaps, so a query only has to look at
+    the few buckets under the probe rect instead of the whole group.
+    Each hashed sprite remembers its cell range in ``_space_key``.
+    """
+    def __init__(self, cell=SPATIAL_HASH_CELL):
+        self.cell = cell
+        self.d: dict[tuple[int,int], list] = {}
+
+    def _cell_range(self, rect):
+        cs = self.cell
+        return (rect.left // cs, (rect.right - 1) // cs,
+                rect.top // cs, (rect.bottom - 1) // cs)
+
+    def clear(self):
+        self.d.clear()
+
+    def _add(self, sprite, cells):
+        x0, x1, y0, y1 = cells
+        d = self.d
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = d.get((cx, cy))
+                if bucket is None: d[(cx, cy)] = [sprite]
+                else: bucket.append(sprite)
+
+    def _discard(self, sprite, cells):
+        x0, x1, y0, y1 = cells
+        d = self.d
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = d.get((cx, cy))
+                if bucket and sprite in bucket:
+                    bucket.remove(sprite)
+                    if not bucket: del d[(cx, cy)]
+
+    def move(self, sprite):
+        # Dirty check: most sprites stay inside the same cell range for many
+        # frames, so only touch the buckets when that range actually changes.
+        cells = self._cell_range(sprite.rect)
+        old = sprite._space_key
+        if cells == old: return
+        if old is not None: self._discard(sprite, old)
+        self._add(sprite, cells)
+        sprite._space_key = cells
+
+    add = move
+
+    def remove(self, sprite):
+        if sprite._space_key is not None:
+            self._discard(sprite, sprite._space_key)
+            sprite._space_key = None
+
+    def query_rect(self, rect) -> set:
+        # set() dedupes sprites that span several of the probed cells
+        x0, x1, y0, y1 = self._cell_range(rect)
+        d = self.d; found = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = d.get((cx, cy))
+                if bucket: found.update(bucket)
+        return found
+
+
+class _QuadNode:
+    __slots__ = ("rect", "items", "kids")
+    def __init__(self, rect):
+        self.rect = rect; self.items = []; self.kids = None
+
+class Quadtree:
+    """
+    Fixed-depth quadtree over the screen. A sprite lives in the deepest
+    node that fully contains its rect (the root also takes anything that
+    sticks out of the screen), which groups mixed sizes - a BigEnemy next
+    to a swarm of small shooters - better than a uniform grid.
+    """
+    def __init__(self, bounds=SCREEN_RECT, min_leaf=QUADTREE_MIN_LEAF):
+        self.root = _QuadNode(pygame.Rect(bounds))
+        self.min_leaf = min_leaf
+        self._split(self.root)
+
+    def _split(self, node):
+        x, y, w, h = node.rect
+        hw, hh = w // 2, h // 2
+        if hw < self.min_leaf or hh < self.min_leaf:
+            return
+        node.kids = [_QuadNode(pygame.Rect(x,      y,      hw,     hh)),
+                     _QuadNode(pygame.Rect(x + hw, y,      w - hw, hh)),
+                     _QuadNode(pygame.Rect(x,      y + hh, hw,     h - hh)),
+                     _QuadNode(pygame.Rect(x + hw, y + hh, w - hw, h - hh))]
+        for k in node.kids: self._split(k)
+
+    def _locate(self, rect):
+        node = self.root
+        while node.kids:
+            for k in node.kids:
+                if k.rect.contains(rect):
+                    node = k
+                    break
             else:
-                e = BigEnemy(
-                    ev.cx, ev.cy,
-                    self.img_big,
-                    ev.w_cells, ev.h_cells,
-                    self.cell_w, self.cell_h,
-                    shooter_img=self.img_shooter,
-                )
-                enemies_group.add(e)
-                if DEBUG_SPAWN:
-                    print(f"[SPAWN] BigEnemy {ev.w_cells}x{ev.h_cells} at row {ev.min_row}, center=({ev.cx},{ev.cy})")
-                return  # done
-
-        # Normal spawns
-        if letter == "S":
-            e = ShooterEnemy(ev.cx, ev.cy, self.img_shooter); e.target_ref = player_ref
-        elif letter == "K":
-            e = KamikazeEnemy(ev.cx, ev.cy, self.img_kamikaze); e.target_ref = player_ref
-        else:
-            e = Enemy(ev.cx, ev.cy, self.img_shooter, hp=2)
-
-        enemies_group.add(e)
+                break
+        return node
+
+    def clear(self):
+        stack = [self.root]
+        while stack:
+            node = stack.pop(); node.items.clear()
+            if node.kids: stack.extend(node.kids)
+
+    def move(self, sprite):
+        node = self._locate(sprite.rect)
+        old = sprite._space_key
+        if node is old: return
+        if old is not None: old.items.remove(sprite)
+        node.items.append(sprite)
+        sprite._space_key = node
+
+    add = move
+
+    def remove(self, sprite):
+        node = sprite._space_key
+        if node is not None:
+            if sprite in node.items: node.items.remove(sprite)
+            sprite._space_key = None
+
+    def query_rect(self, rect) -> list:
+        # every sprite is filed exactly once, so no dedupe is needed
+        found = []; stack = [self.root]
+        while stack:
+            node = stack.pop()
+            found.extend(node.items)
+            if node.kids:
+                stack.extend(k for k in node.kids if k.rect.colliderect(rect))
+        return found
 
 
 class Game:
@@ -672,8 +1048,11 @@ class Game:
         pygame.init()
         # Use default font (works on web)
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT)); pygame.display.set_caption("1942-lite")
-        self.clock = pygame.time.Clock(); self.font    = pygame.font.Font(None, 18); self.bigfont = pygame.font.Font(None, 28)
-        self.running = True; self.paused = False; self.debug = False
+        self.font    = pygame.font.Font(None, 18); self.bigfont = pygame.font.Font(None, 28)
+        self.running = True; self.paused = False; self.debug = False; self.now = time.perf_counter(); self.frame_idx = 0
+        self.clock = pygame.time.Clock()  # frame pacing only; timestamps come from perf_counter
+        self._text_cache = {}  # (font id, text, color) -> Surface, see _render_text
+        self._hud_surf = pygame.Surface(HUD_RECT.size, pygame.SRCALPHA).convert_alpha(); self._hud_key = None
         self.controls = TouchControls()
         self.assets = {
             "player":         load_image(os.path.join(ASSETS_DIR, "player.png"),         (28,28), (70,160,255)),
@@ -682,12 +1061,19 @@ class Game:
             "enemy_big":      load_image(os.path.join(ASSETS_DIR, "enemy_big.png"),      (54,42), (180,60,200)),
             "explosion_frames": load_explosion_frames(ASSETS_DIR, "explosion_", 6),
         }
+        prewarm_sprite_surfaces()
 
-        self.all_sprites = pygame.sprite.Group(); self.enemies = pygame.sprite.Group()
-        self.player_bullets = pygame.sprite.Group(); self.enemy_bullets = pygame.sprite.Group(); self.drops = pygame.sprite.Group(); self.fx = pygame.sprite.Group()
+        self.all_sprites = pygame.sprite.Group(); self.enemies = FastGroup()
+        self.pending_enemies = pygame.sprite.Group()  # spawned but still entirely above the screen
+        # every enemy kind takes update(dt, bullets_group), so one enemies.update(dt, ebs) call drives them all
+        self.player_bullets = FastGroup(); self.enemy_bullets = FastGroup(); self.drops = FastGroup(); self.fx = FastGroup()
+        self.enemy_space: CollisionSpace = Quadtree() if COLLISION_BACKEND == "quadtree" else SpatialHash()
         self.player = pygame.sprite.GroupSingle(Player(WIDTH//2, HEIGHT-70, self.assets["player"]))
         self.level_paths = level_paths; self.level_index = 0; 
         self.bg = None
+        self._prev_dirty = None; self._shown_safe_zone = False; self._shown_overlay = False  # dirty-rect bookkeeping for render()
+        # Desktop: decode the next level's background while the current one is played (no threads on pygbag)
+        self._bg_pool = None if IS_WEB else ThreadPoolExecutor(max_workers=1); self._bg_prefetch = None
         self.load_level(self.level_paths[self.level_index])
         self.safe_zone_active = False; self.safe_zone_y = HEIGHT - 80
 
@@ -698,10 +1084,17 @@ class Game:
         grid = load_level_grid(path)
         self.timeline = LevelTimeline(grid, self.assets)
         self.safe_zone_active = False
-        self.enemy_bullets.empty(); self.enemies.empty(); self.drops.empty(); self.fx.empty()
+        self.enemy_bullets.empty(); self.enemies.empty(); self.pending_enemies.empty(); self.drops.empty(); self.fx.empty()
+        self.enemy_space.clear()
 
+        self._prev_dirty = None  # first frame of a level always flips
         lvl_num = _extract_level_number_from_path(path)
-        self.bg = load_level_background(lvl_num)
+        raw_segs = None
+        if self._bg_prefetch and self._bg_prefetch[0] == lvl_num:
+            try: raw_segs = self._bg_prefetch[1].result()
+            except Exception: raw_segs = None  # fall back to a synchronous load
+        self._bg_prefetch = None
+        self.bg = load_level_background(lvl_num, raw_segs)
 
         # Start with the last part of the stack on-screen (no initial black)
         if self.bg and self.bg.total_h > 0:
@@ -709,30 +1102,42 @@ class Game:
 
         print(f"[BG] Level {lvl_num}: segments={len(self.bg.segs)} total_h={self.bg.total_h}")
 
+        nxt = self.level_index + 1
+        if self._bg_pool and nxt < len(self.level_paths):
+            nxt_num = _extract_level_number_from_path(self.level_paths[nxt])
+            self._bg_prefetch = (nxt_num, self._bg_pool.submit(_decode_bg_segments, nxt_num))
+
     def spawn_safe_zone_if_ready(self):
         if not self.timeline.done_spawning: return
         if self.timeline.all_spawned_time is not None:
-            if pygame.time.get_ticks() - self.timeline.all_spawned_time >= SAFE_ZONE_TAIL_MS: self.safe_zone_active = True
+            if (self.now - self.timeline.all_spawned_time) * 1000.0 >= SAFE_ZONE_TAIL_MS: self.safe_zone_active = True
 
     async def run(self):
+        last = time.perf_counter(); last_ms = int(last * 1000)
         while self.running:
-            dt = self.clock.tick(FPS)/1000.0; dt_ms = dt*1000.0
+            # SDL's precise delay paces the frame; the zero sleep is only the
+            # yield that lets the browser breathe on pygbag. dt comes from
+            # perf_counter, since time.monotonic can tick at ~15.6 ms on Windows.
+            self.clock.tick(FPS); await asyncio.sleep(0)
+            now = time.perf_counter(); dt = now - last; last = now
+            # whole-ms delta taken off an integer clock, so the timeline's row timer
+            # stays an int and truncation never accumulates across frames
+            now_ms = int(now * 1000); dt_ms = now_ms - last_ms; last_ms = now_ms
+            self.now = now  # the frame's timestamp; everything else uses self.now
             self.handle_events()
+            self._keys = pygame.key.get_pressed()  # one keyboard snapshot per frame
             if not self.paused:
                 await self.update(dt, dt_ms)
             self.render()
 
-            # Important for pygbag: let the browser breathe
-            if IS_WEB:
-                await asyncio.sleep(0)
-
         # On desktop, quit pygame at the end
         if not IS_WEB:
+            if self._bg_pool: self._bg_pool.shutdown(wait=True)  # don't tear SDL down under a decode
             pygame.quit()
 
     def handle_events(self):
         for e in pygame.event.get():
-            self.controls.handle_event(e)
+            self.controls.handle_event(e)  # mouse + finger -> touch controls (pygbag/mobile)
 
             if e.type == pygame.QUIT: self.running=False
             elif e.type == pygame.KEYDOWN:
@@ -741,115 +1146,113 @@ class Game:
                 elif e.key == pygame.K_F1: self.debug = not self.debug
                 elif e.key == pygame.K_f:
                     px, py = self.player_sprite.rect.center
-                    self.drops.add(Drop(px, py - 20, "fan"))
-            
-            elif e.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION):
-                self.controls.handle_mouse_event(e)
-
-            # --- finger -> touch controls (pygbag/mobile) ---
-            elif e.type in (pygame.FINGERDOWN, pygame.FINGERMOTION, pygame.FINGERUP):
-                self.controls.handle_finger_event(e)
-
-        keys = pygame.key.get_pressed()
-        if not self.paused:
-            self.player_sprite.update(0, keys)
-            if keys[pygame.K_SPACE]: self.player_sprite.shoot(time.perf_counter(), self.player_bullets)
+                    self.drops.add(Drop.spawn(px, py - 20, "fan"))
 
     async def update(self, dt, dt_ms):
-        keys = pygame.key.get_pressed(); self.player_sprite.update(dt, keys)
-        ax, ay = self.controls.get_axis()   # [-1..1]
-        if ax or ay:
-            self.player_sprite.rect.x += int(ax * PLAYER_SPEED * dt)
-            self.player_sprite.rect.y += int(ay * PLAYER_SPEED * dt)
-            self.player_sprite.rect.clamp_ip(pygame.Rect(0, 0, WIDTH, HEIGHT))
-
-        # Virtual fire (hold to auto-fire at your normal cooldown)
-        if self.controls.is_fire():
-            self.player_sprite.shoot(time.perf_counter(), self.player_bullets)
-
-        move = self.controls.get_vector() * PLAYER_SPEED
-        if move.length_squared() > 0:
-            self.player_sprite.rect.x += int(move.x * dt)
-            self.player_sprite.rect.y += int(move.y * dt)
-            self.player_sprite.rect.clamp_ip(pygame.Rect(0,0,WIDTH,HEIGHT))
-
-        # --- Touch fire button ---
-        if self.controls.is_firing():
-            self.player_sprite.shoot(time.perf_counter(), self.player_bullets)
-
-        self.timeline.update(dt_ms, self.enemies, self.player_sprite, self.enemy_bullets); self.spawn_safe_zone_if_ready()
-        for e in list(self.enemies):
-            if isinstance(e, ShooterEnemy): e.update(dt, bullets_group=self.enemy_bullets)
-            else: e.update(dt)
-        self.player_bullets.update(dt); self.enemy_bullets.update(dt); self.drops.update(dt); self.fx.update(dt)
+        self.frame_idx += 1  # counts unpaused frames, so the flicker holds while paused
+        # Bind hot attributes to locals once; the body below runs every frame
+        player = self.player_sprite; prect = player.rect; now = self.now
+        pbs = self.player_bullets; ebs = self.enemy_bullets; space = self.enemy_space
+        controls = self.controls; fx = self.fx; drops = self.drops
+        # ...and module-level names used inside the per-bullet loop (LOAD_FAST, not LOAD_GLOBAL)
+        rect_of = _rect_of; spawn_fx = Explosion.spawn; fx_frames = self.assets["explosion_frames"]
+
+        keys = self._keys; player.update(dt, keys, *controls.get_axis())  # stick axis in [-1..1]
+        # SPACE or the virtual fire button (hold to auto-fire at your normal cooldown)
+        if keys[_K_SPACE] or controls.fire_held: player.shoot(now, pbs)
+
+        self.timeline.update(dt_ms, now, self.pending_enemies, player, ebs); self.spawn_safe_zone_if_ready()
+        self.enemies.update(dt, ebs)  # one Group.update dispatch; broad-phase sync happens in _cull_offscreen
+        # Off-screen spawns only scroll down (no steering, no fire timer) until they show up
+        for e in self.pending_enemies:
+            e.fy += e.vy * dt; e.rect.centery = int(e.fy)
+            if e.rect.bottom > 0:
+                self.pending_enemies.remove(e); self.enemies.add(e); space.add(e)
+        pbs.update(dt); ebs.update(dt); drops.update(dt); fx.update(dt)
         if self.bg: self.bg.update(dt)
-
-        for bullet in list(self.player_bullets):
-            hits = [sp for sp in self.enemies if sp.rect.colliderect(bullet.rect)]
+        self._cull_offscreen()
+
+        # Broad phase: bullets only probe the part of enemy_space under their own rect
+        for bullet in pbs:
+            cands = list(space.query_rect(bullet.rect))  # collideobjectsall wants a sequence
+            if not cands: continue
+            # Narrow phase runs in pygame's C rect code, not per-pair Python calls
+            hits = bullet.rect.collideobjectsall(cands, key=rect_of)
             if hits:
                 bullet.kill()
                 for enemy in hits:
-                    dead = enemy.damage(1)
-                    if dead:
-                        self.fx.add(Explosion(enemy.rect.centerx, enemy.rect.centery, self.assets["explosion_frames"]))
-                        enemy.kill()
-                        cx, cy = enemy.rect.center
-                        if random.random() < DROP_CHANCE:
-                            pool = []
-                            for k, w in DROP_WEIGHTS.items():
-                                pool.extend([k] * int(max(1, w)))
-                            kind = random.choice(pool)
-                            self.drops.add(Drop(cx, cy, kind))
-
-        if self.player_sprite.invuln_t <= 0:
-            if pygame.sprite.spritecollideany(self.player_sprite, self.enemy_bullets) or pygame.sprite.spritecollideany(self.player_sprite, self.enemies):
-                px, py = self.player_sprite.rect.center; alive = self.player_sprite.damage()
-                for b in list(self.enemy_bullets):
-                    if self.player_sprite.rect.colliderect(b.rect): b.kill()
-                self.fx.add(Explosion(px, py, self.assets["explosion_frames"]))
+                    if enemy.damage(1):  # damage() already kills the sprite
+                        fx.add(spawn_fx(enemy.rect.centerx, enemy.rect.centery, fx_frames))
+                        space.remove(enemy)
+                        enemy.maybe_drop(drops)
+
+        if player.invuln_t <= 0:
+            # Enemy bullets and broad-phase enemy neighbours (ramming) go
+            # through one C-side pass; bullets among the hits get cleared.
+            hits = prect.collideobjectsall(ebs.sprites() + list(space.query_rect(prect)), key=rect_of)
+            if hits:
+                px, py = prect.center; alive = player.damage()
+                for h in hits:
+                    if isinstance(h, Bullet): h.kill()
+                fx.add(spawn_fx(px, py, fx_frames))
                 if not alive: await self.game_over()
-                else: self.player_sprite.rect.center = (px, py)
-        got = pygame.sprite.spritecollide(self.player_sprite, self.drops, dokill=True)
-        now = time.perf_counter()
-        for d in got:
+                else: player.place(px, py)
+        # Most frames have no drops on screen: skip building the list and the C call
+        for d in (prect.collideobjectsall(drops.sprites(), key=rect_of) if drops else ()):
+            d.kill()
             if d.kind == "health":
-                self.player_sprite.lives = min(9, self.player_sprite.lives + 1)
+                player.lives = min(9, player.lives + 1)
             elif d.kind == "ammo":
-                self.player_sprite.ammo = min(9999, self.player_sprite.ammo + 50)
+                player.ammo = min(9999, player.ammo + 50)
             elif d.kind == "enhanced":
-                self.player_sprite.grant_enhanced(now)
+                player.grant_enhanced(now)
             elif d.kind == "fan":
-                self.player_sprite.grant_fan(now)
-
-        if self.safe_zone_active and self.player_sprite.rect.top <= self.safe_zone_y: await self.next_level_or_win()
+                player.grant_fan(now)
+
+        if self.safe_zone_active and prect.top <= self.safe_zone_y: await self.next_level_or_win()
+
+    def _cull_offscreen(self):
+        # One bounds pass for everything that can leave the screen (sprite
+        # update()s don't check). Pending enemies are above the top by design.
+        # Enemies that stay get their (moved) rect re-synced into enemy_space.
+        sr = SCREEN_RECT
+        for grp in (self.player_bullets, self.enemy_bullets, self.drops):
+            for s in grp:
+                if not sr.colliderect(s.rect): s.kill()
+        space = self.enemy_space
+        for e in self.enemies:
+            if sr.colliderect(e.rect): space.move(e)
+            else: e.kill(); space.remove(e)
 
     async def next_level_or_win(self):
         self.level_index += 1
         if self.level_index < len(self.level_paths):
             await self.banner("LEVEL CLEARED!", (80,220,80), delay=1200)
             self.load_level(self.level_paths[self.level_index])
-            self.player_sprite.rect.center = (WIDTH//2, HEIGHT-70); self.player_sprite.invuln_t = 1.0
+            self.player_sprite.place(WIDTH//2, HEIGHT-70); self.player_sprite.invuln_t = 1.0
         else:
             await self.win_and_exit()
 
-    async def game_over(self):
+    def _show_message(self, text, color):
+        # Full-screen card: the whole window goes black, so this has to flip;
+        # update(text_rect) would leave the last game frame around the text.
+        # It also invalidates render()'s dirty-rect history.
         surf = self.screen; surf.fill(BLACK)
-        txt = self.bigfont.render("GAME OVER", True, RED); surf.blit(txt, txt.get_rect(center=(WIDTH//2, HEIGHT//2)))
-        pygame.display.flip()
+        txt = self.bigfont.render(text, True, color); surf.blit(txt, txt.get_rect(center=(WIDTH//2, HEIGHT//2)))
+        pygame.display.flip(); self._prev_dirty = None
+
+    async def game_over(self):
+        self._show_message("GAME OVER", RED)
         await sleep_ms(2200)
         self.running = False
 
     async def win_and_exit(self):
-        surf = self.screen; surf.fill(BLACK)
-        txt = self.bigfont.render("SAFE ZONE REACHED! YOU WIN!", True, GREEN); surf.blit(txt, txt.get_rect(center=(WIDTH//2, HEIGHT//2)))
-        pygame.display.flip()
+        self._show_message("SAFE ZONE REACHED! YOU WIN!", GREEN)
         await sleep_ms(2200)
         self.running = False
 
     async def banner(self, text, color, delay=1000):
-        surf = self.screen; surf.fill(BLACK)
-        b = self.bigfont.render(text, True, color); surf.blit(b, b.get_rect(center=(WIDTH//2, HEIGHT//2)))
-        pygame.display.flip()
+        self._show_message(text, color)
         await sleep_ms(delay)
 
     def render(self):
@@ -857,35 +1260,67 @@ class Game:
         if self.bg: self.bg.draw(self.screen)
         if self.safe_zone_active:
             pygame.draw.rect(self.screen, (40,120,40), (0, self.safe_zone_y, WIDTH, HEIGHT - self.safe_zone_y))
-        self.enemies.draw(self.screen); self.player_bullets.draw(self.screen); self.enemy_bullets.draw(self.screen); self.fx.draw(self.screen)
-        if int(self.player_sprite.invuln_t * 10) % 2 == 0 or self.player_sprite.invuln_t <= 0: self.screen.blit(self.player_sprite.image, self.player_sprite.rect)
-        self.drops.draw(self.screen); self.draw_hud(self.screen); 
+        # Gather every sprite (in draw order) and hand them to SDL in one blits() call
+        blit_seq = (self.enemies.blit_sequence() + self.player_bullets.blit_sequence()
+                    + self.enemy_bullets.blit_sequence() + self.fx.blit_sequence())
+        ps = self.player_sprite
+        if ps.invuln_t <= 0 or not (self.frame_idx // BLINK_FRAMES) & 1: blit_seq.append((ps.image, ps.rect))
+        blit_seq += self.drops.blit_sequence()
+        drawn = self.screen.blits(blit_seq)
+        self.draw_hud(self.screen); 
         
         self.controls.draw(self.screen)
-        pygame.display.flip()
+
+        # The back buffer is always fully repainted. When the background hasn't
+        # scrolled a whole pixel, only sprite areas (this frame's and last
+        # frame's) plus HUD/controls differ from what is on screen, so push just
+        # those; anything else (scroll, pause/debug overlay shown or just
+        # cleared, safe-zone toggle) flips.
+        # Keep flip() as the default: once most of the screen changes, one flip
+        # is cheaper than update() over a long rect list.
+        prev = self._prev_dirty; self._prev_dirty = drawn
+        overlay = self.paused or self.debug
+        if (prev is None or not self.bg or self.bg.pixel_moved or overlay or self._shown_overlay
+                or self.safe_zone_active != self._shown_safe_zone):
+            pygame.display.flip()
+        else:
+            pygame.display.update(drawn + prev + [HUD_RECT] + self.controls.dirty_rects())
+        self._shown_safe_zone = self.safe_zone_active; self._shown_overlay = overlay
+
+    def _render_text(self, font, text, color):
+        # HUD strings repeat for many frames (timers are quantised to 0.1s), so
+        # keep rendered surfaces; oldest entry goes first when the cache fills up
+        key = (id(font), text, color); cache = self._text_cache
+        s = cache.pop(key, None)
+        if s is None:
+            s = font.render(text, True, color)
+            if len(cache) >= HUD_TEXT_CACHE_MAX: del cache[next(iter(cache))]
+        cache[key] = s  # (re)insert as most recent
+        return s
 
     def draw_hud(self, surf):
-        lives_s = self.font.render(f"Lives: {max(0,self.player_sprite.lives)}", True, WHITE); surf.blit(lives_s, (8, 8))
-        now = time.perf_counter()
-        if self.player_sprite.has_enhanced(now):
-            rem = max(0.0, self.player_sprite.enhanced_until - now); enh_s = self.font.render(f"Enhanced: {rem:0.1f}s", True, YELLOW); surf.blit(enh_s, (8, 30))
-        if self.player_sprite.has_fan(now):
-            rem2 = max(0.0, self.player_sprite.fan_until - now)
-            fan_s = self.font.render(f"Diagonal: {rem2:0.1f}s", True, YELLOW)
-            surf.blit(fan_s, (8, 52))
+        # the Lives/Enhanced/Diagonal block only changes on damage or a 0.1s timer
+        # tick, so compose it once per change and blit the cached layer otherwise
+        ps = self.player_sprite; now = self.now
+        enh = f"Enhanced: {max(0.0, ps.enhanced_until - now):0.1f}s" if ps.has_enhanced(now) else None
+        fan = f"Diagonal: {max(0.0, ps.fan_until - now):0.1f}s" if ps.has_fan(now) else None
+        key = (max(0, ps.lives), enh, fan)
+        if key != self._hud_key:
+            self._hud_key = key; layer = self._hud_surf; layer.fill((0, 0, 0, 0))
+            layer.blit(self._render_text(self.font, f"Lives: {key[0]}", WHITE), (8, 8))
+            if enh: layer.blit(self._render_text(self.font, enh, YELLOW), (8, 30))
+            if fan: layer.blit(self._render_text(self.font, fan, YELLOW), (8, 52))
+        surf.blit(self._hud_surf, HUD_RECT)
         if self.paused:
-            p = self.bigfont.render("PAUSED - P to resume, Q/Esc to quit", True, WHITE); surf.blit(p, p.get_rect(center=(WIDTH//2, HEIGHT//2)))
+            p = self._render_text(self.bigfont, "PAUSED - P to resume, Q/Esc to quit", WHITE); surf.blit(p, p.get_rect(center=(WIDTH//2, HEIGHT//2)))
         if self.debug:
-            dbg = self.font.render(f"Enemies:{len(self.enemies)} PB:{len(self.player_bullets)} EB:{len(self.enemy_bullets)} FX:{len(self.fx)}", True, GRAY); surf.blit(dbg, (8, HEIGHT-22))
+            dbg = self._render_text(self.font, f"Enemies:{len(self.enemies)} Pending:{len(self.pending_enemies)} PB:{len(self.player_bullets)} EB:{len(self.enemy_bullets)} FX:{len(self.fx)}", GRAY); surf.blit(dbg, (8, HEIGHT-22))
 
 def discover_level_files(level_dir=LEVELS_DIR):  # default now absolute
     files = []
-    for p in glob.glob(os.path.join(level_dir, "level*.txt")):
-        base = os.path.basename(p)
-        try: num = int(''.join(ch for ch in base if ch.isdigit()))
-        except ValueError: num = 9999
-        files.append((num, p))
-    files.sort(key=lambda x: (x[0], x[1]))
+    for p in glob.iglob(os.path.join(level_dir, "level*.txt")):
+        files.append((_extract_level_number_from_path(p, 9999), p))  # digit-less names go last
+    files.sort()
     return [p for _,p in files]
 
 async def main_async():